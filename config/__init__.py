@@ -141,8 +141,11 @@ class Config:
     # ============================================================
     
     ENABLE_AI_ENHANCEMENT = os.getenv("ENABLE_AI_ENHANCEMENT", "false").lower() == "true"
+    AI_CONCURRENCY = max(1, int(os.getenv("AI_CONCURRENCY", "8")))  # Parallel AI enhancement requests (at least 1)
     ENABLE_TEXT_ENHANCEMENT = os.getenv("ENABLE_TEXT_ENHANCEMENT", "false").lower() == "true"
     CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.3"))
+    # Record count at which duplicate merging switches from the full N x N score matrix to MinHash-LSH (needs datasketch)
+    MERGE_LSH_MIN_RECORDS = int(os.getenv("MERGE_LSH_MIN_RECORDS", "3000"))
     SUBMITTER_EMAIL = os.getenv("SUBMITTER_EMAIL")
     
     # ============================================================
@@ -40,6 +40,12 @@ MODEL_VERSION = "vofc-engine-sp:v1"
 
 
 
+# Rows per bulk insert for vulnerability-OFC links (stays well under PostgREST limits)
+
+LINK_BATCH_SIZE = 500
+
+
+
 # --- Utils ------------------------------------------------------------------
 
 def _s(val):
@@ -263,6 +269,12 @@ def sync_to_supabase(result_json, filename):
 
 
 
+        # Links are collected here and inserted in bulk after the loop
+
+        link_payloads = []
+
+
+
         # --- 2️⃣ Insert vulnerabilities individually ---
 
         for idx, item in enumerate(vulns, start=1):
@@ -357,9 +369,17 @@ def sync_to_supabase(result_json, filename):
 
             }
 
-            supabase.table("submission_vulnerability_ofc_links").insert(link_payload).execute()
+            link_payloads.append(link_payload)
+
+            log.info(f"[{idx}] Queued link vuln {vuln_id} → ofc {ofc_id}")
+
+
+
+        for start in range(0, len(link_payloads), LINK_BATCH_SIZE):
+
+            supabase.table("submission_vulnerability_ofc_links").insert(link_payloads[start:start + LINK_BATCH_SIZE]).execute()
 
-            log.info(f"[{idx}] Linked vuln {vuln_id} → ofc {ofc_id}")
+        log.info(f"Inserted {len(link_payloads)} vulnerability-OFC links")
 
 
 
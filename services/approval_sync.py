@@ -41,9 +41,14 @@ def get_supabase_client() -> Client:
 def sync_approvals_once():
     """Check for approved submissions and update learning_events."""
     try:
+        # One timestamp for the whole sync pass (used for the cutoff and as the
+        # reviewed_at/created_at fallback for every submission in the batch)
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        
         # Get submissions with status 'approved' updated in the last 24 hours
         # Calculate time 24 hours ago
-        cutoff_time = (datetime.utcnow() - timedelta(hours=24)).isoformat()
+        cutoff_time = (now - timedelta(hours=24)).isoformat()
         
         supabase = get_supabase_client()
         res = supabase.table("submissions") \
@@ -79,12 +84,12 @@ def sync_approvals_once():
                 # Preserve existing metadata if it exists
                 existing_metadata = event.get("metadata")
                 if isinstance(existing_metadata, dict):
-                    existing_metadata["reviewed_at"] = sub.get("reviewed_at") or datetime.utcnow().isoformat()
+                    existing_metadata["reviewed_at"] = sub.get("reviewed_at") or now_iso
                     existing_metadata["auto_approved"] = True
                     update_payload["metadata"] = existing_metadata
                 else:
                     update_payload["metadata"] = {
-                        "reviewed_at": sub.get("reviewed_at") or datetime.utcnow().isoformat(),
+                        "reviewed_at": sub.get("reviewed_at") or now_iso,
                         "auto_approved": True
                     }
                 
@@ -104,9 +109,9 @@ def sync_approvals_once():
                     "confidence_score": None,
                     "metadata": {
                         "auto_generated": True,
-                        "reviewed_at": sub.get("reviewed_at") or datetime.utcnow().isoformat()
+                        "reviewed_at": sub.get("reviewed_at") or now_iso
                     },
-                    "created_at": datetime.utcnow().isoformat()
+                    "created_at": now_iso
                 }
                 
                 supabase.table("learning_events") \
@@ -12,6 +12,20 @@ from typing import Dict, Any, Optional, List
 from config import Config
 from config.exceptions import ServiceError, FileOperationError
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
+# Learning feedback is optional; resolve it once at import instead of per prompt
+try:
+    from services.learning_feedback import get_enrichment_themes, get_enrichment_examples
+    _LEARNING_FEEDBACK_AVAILABLE = True
+except ImportError:
+    _LEARNING_FEEDBACK_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 # Use centralized config for Ollama URL
@@ -20,6 +34,33 @@ OLLAMA_URL = Config.OLLAMA_URL  # Backward compatibility
 
 # Engine configuration cache
 _engine_config: Optional[Dict[str, Any]] = None
+# Whether the loaded configuration enables any prompt enhancement (set by load_engine_config)
+_has_enhancements: bool = True
+
+# Filename markers that always trigger a built-in document bias
+_BUILTIN_BIAS_MARKERS = ("usss", "averting")
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _encode_payload(payload: Any) -> bytes:
+    """Encode a request body once (orjson when available) for use with data=."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _splice_body(head: bytes, encoded_prompt: bytes, tail: bytes, extra: bytes) -> bytes:
+    """
+    Assemble a JSON request body around an already-escaped prompt literal.
+    
+    extra holds the encoded **kwargs members (without braces); they are appended
+    last so they override template keys, as the previous dict merge did.
+    """
+    if extra:
+        return head + encoded_prompt + tail + b"," + extra + b"}"
+    return head + encoded_prompt + tail + b"}"
+
 
 def load_engine_config() -> Dict[str, Any]:
     """
@@ -33,7 +74,7 @@ def load_engine_config() -> Dict[str, Any]:
     Returns:
         Dictionary with engine configuration
     """
-    global _engine_config
+    global _engine_config, _has_enhancements
     
     if _engine_config is not None:
         return _engine_config
@@ -61,16 +102,23 @@ def load_engine_config() -> Dict[str, Any]:
                 # Merge with defaults
                 _engine_config = {**default_config, **yaml_config}
                 logger.info(f"Loaded engine config from {config_path}")
-        except (yaml.YAMLError, IOError, OSError) as e:
+        except (yaml.YAMLError, IOError, OSError, TypeError) as e:
+            # TypeError: YAML document is not a mapping and cannot be merged
             logger.warning(f"Failed to load config from {config_path}: {e}, using defaults")
             _engine_config = default_config
-        except Exception as e:
-            logger.error(f"Unexpected error loading config from {config_path}: {e}", exc_info=True)
-            _engine_config = default_config
     else:
         logger.info(f"Config file not found at {config_path}, using defaults")
         _engine_config = default_config
     
+    topics = _engine_config.get("VOFC_ENGINE_TOPICS") or {}
+    _has_enhancements = bool(
+        _engine_config.get("document_biases")
+        or _engine_config.get("themes")
+        or topics.get("narrative_risk")
+        or topics.get("thematic_expansion")
+        or _LEARNING_FEEDBACK_AVAILABLE
+    )
+    
     return _engine_config
 
 
@@ -103,7 +151,7 @@ def get_document_bias(file_path: str) -> str:
                 bias_prompts.append(bias_config)
     
     # Hard-coded patterns (can be moved to config)
-    if "usss" in file_lower or "averting" in file_lower:
+    if any(marker in file_lower for marker in _BUILTIN_BIAS_MARKERS):
         bias_prompts.append("Focus on systemic and behavioral vulnerabilities, not IT or cyber.")
         bias_prompts.append("Look for narrative findings and recommended actions.")
     
@@ -122,9 +170,10 @@ def get_enrichment_context(file_path: str) -> str:
     Returns:
         Additional prompt context based on past corrections
     """
+    if not _LEARNING_FEEDBACK_AVAILABLE:
+        return ""
+    
     try:
-        from services.learning_feedback import get_enrichment_themes, get_enrichment_examples
-        
         filename = Path(file_path).name
         themes = get_enrichment_themes(filename, limit=5)
         examples = get_enrichment_examples(filename, limit=3)
@@ -148,9 +197,6 @@ def get_enrichment_context(file_path: str) -> str:
     except (FileNotFoundError, PermissionError, OSError) as e:
         logger.debug(f"Could not load enrichment context: {e}")
         return ""
-    except Exception as e:
-        logger.warning(f"Unexpected error loading enrichment context: {e}", exc_info=True)
-        return ""
 
 
 def build_enhanced_prompt(base_prompt: str, file_path: str = "", text: str = "") -> str:
@@ -166,6 +212,13 @@ def build_enhanced_prompt(base_prompt: str, file_path: str = "", text: str = "")
         Enhanced prompt with configuration and enrichment context
     """
     config = load_engine_config()
+    
+    # Nothing configured and no built-in bias for this file: skip bias/enrichment lookups
+    if not _has_enhancements:
+        file_lower = file_path.lower()
+        if not any(marker in file_lower for marker in _BUILTIN_BIAS_MARKERS):
+            return base_prompt
+    
     topics = config.get("VOFC_ENGINE_TOPICS", {})
     
     enhancements = []
@@ -232,11 +285,12 @@ def generate_text(prompt, model="llama2", **kwargs):
     try:
         response = requests.post(
             f"{OLLAMA_HOST}/api/generate",
-            json={
+            data=_encode_payload({
                 "model": model,
                 "prompt": prompt,
                 **kwargs
-            },
+            }),
+            headers=_JSON_HEADERS,
             timeout=120
         )
         response.raise_for_status()
@@ -249,20 +303,18 @@ def generate_text(prompt, model="llama2", **kwargs):
         raise ServiceError(f"Ollama generation timeout: {e}") from e
     except requests.exceptions.RequestException as e:
         raise ServiceError(f"Ollama generation request failed: {e}") from e
-    except Exception as e:
-        logger.error(f"Unexpected error in Ollama generation: {e}", exc_info=True)
-        raise ServiceError(f"Ollama generation failed: {e}") from e
 
 def chat(messages, model="llama2", **kwargs):
     """Chat with Ollama model"""
     try:
         response = requests.post(
             f"{OLLAMA_HOST}/api/chat",
-            json={
+            data=_encode_payload({
                 "model": model,
                 "messages": messages,
                 **kwargs
-            },
+            }),
+            headers=_JSON_HEADERS,
             timeout=120
         )
         response.raise_for_status()
@@ -275,9 +327,6 @@ def chat(messages, model="llama2", **kwargs):
         raise ServiceError(f"Ollama chat timeout: {e}") from e
     except requests.exceptions.RequestException as e:
         raise ServiceError(f"Ollama chat request failed: {e}") from e
-    except Exception as e:
-        logger.error(f"Unexpected error in Ollama chat: {e}", exc_info=True)
-        raise ServiceError(f"Ollama chat failed: {e}") from e
 
 def run_model(model="psa-engine:latest", prompt="", file_path="", **kwargs):
     """
@@ -299,22 +348,23 @@ def run_model(model="psa-engine:latest", prompt="", file_path="", **kwargs):
     # Try /api/chat first with format='json' (like old VOFC Engine)
     # This forces Ollama to return valid JSON
     chat_url = f"{OLLAMA_HOST}/api/chat"
-    chat_payload = {
-        "model": model,
-        "messages": [
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        "format": "json",  # CRITICAL: Forces JSON output
-        "stream": False,
-        **kwargs
-    }
+    
+    # Escape the (potentially multi-KB) prompt once; the chat body and the
+    # generate fallback both splice in the same encoded literal
+    encoded_prompt = _encode_payload(prompt)
+    encoded_model = _encode_payload(model)
+    extra = _encode_payload(kwargs)[1:-1] if kwargs else b""
+    chat_body = _splice_body(
+        b'{"model":' + encoded_model + b',"messages":[{"role":"user","content":',
+        encoded_prompt,
+        # format=json is CRITICAL: forces Ollama to return valid JSON
+        b'}],"format":"json","stream":false',
+        extra
+    )
     
     try:
         # Try chat API first (enforces JSON format)
-        response = requests.post(chat_url, json=chat_payload, timeout=300)
+        response = requests.post(chat_url, data=chat_body, headers=_JSON_HEADERS, timeout=300)
         response.raise_for_status()
         result = response.json()
         
@@ -331,19 +381,19 @@ def run_model(model="psa-engine:latest", prompt="", file_path="", **kwargs):
         logger.warning("Chat API returned unexpected format, falling back to generate API")
         raise ValueError("Unexpected chat response format")
         
-    except (requests.exceptions.RequestException, ValueError) as e:
-        # Fallback to /api/generate if chat fails
+    except (requests.exceptions.RequestException, ValueError, KeyError, TypeError) as e:
+        # Fallback to /api/generate if chat fails or returns an unexpected shape
         logger.debug(f"Chat API failed ({e}), falling back to generate API")
         generate_url = f"{OLLAMA_HOST}/api/generate"
-        generate_payload = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            **kwargs
-        }
+        generate_body = _splice_body(
+            b'{"model":' + encoded_model + b',"prompt":',
+            encoded_prompt,
+            b',"stream":false',
+            extra
+        )
         
         try:
-            response = requests.post(generate_url, json=generate_payload, timeout=300)
+            response = requests.post(generate_url, data=generate_body, headers=_JSON_HEADERS, timeout=300)
             response.raise_for_status()
             result = response.json()
             
@@ -359,12 +409,6 @@ def run_model(model="psa-engine:latest", prompt="", file_path="", **kwargs):
         except requests.exceptions.RequestException as gen_e:
             logger.error(f"Both chat and generate APIs failed. Generate error: {gen_e}")
             raise ServiceError(f"Ollama model execution failed: {gen_e}") from gen_e
-    except (ServiceError, ValueError):
-        # Re-raise ServiceError and ValueError as-is
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error in Ollama model execution: {e}", exc_info=True)
-        raise ServiceError(f"Ollama model execution failed: {e}") from e
 
 def run_model_on_chunks(chunks, model="psa-engine:latest", file_path=""):
     """
@@ -376,16 +420,23 @@ def run_model_on_chunks(chunks, model="psa-engine:latest", file_path=""):
         file_path: Optional file path for configuration-based prompt enhancement
     
     Returns:
-        List of results, one per chunk
+        List of results, one per chunk (failed chunks get a "status": "failed" entry)
+    
+    Raises:
+        ServiceError: If unexpected errors left no chunk with a result
     """
     import json
     
     results = []
     
+    unexpected_errors = 0
+    last_error = None
+    
     for idx, chunk in enumerate(chunks, start=1):
+        chunk_id = f'chunk_{idx}'
         try:
             chunk_content = chunk.get('content', '')
-            chunk_id = chunk.get('chunk_id', f'chunk_{idx}')
+            chunk_id = chunk.get('chunk_id', chunk_id)
             
             # Create prompt for vulnerability analysis with schema wrapper
             # This ensures the model returns structured, parseable JSON
@@ -405,10 +456,8 @@ def run_model_on_chunks(chunks, model="psa-engine:latest", file_path=""):
                     import json as json_module
                     with open(heuristics_path, "r", encoding="utf-8") as f:
                         heuristics = json_module.load(f)
-                except (FileNotFoundError, PermissionError, OSError, json.JSONDecodeError) as e:
+                except (FileNotFoundError, PermissionError, OSError, json.JSONDecodeError, UnicodeDecodeError) as e:
                     logger.debug(f"Could not load heuristics: {e}")
-                except Exception as e:
-                    logger.warning(f"Unexpected error loading heuristics: {e}", exc_info=True)
             
             # Build prompt based on heuristics or default
             if heuristics.get("mode") == "security_guidance":
@@ -462,7 +511,7 @@ Remember: Return ONLY valid JSON, nothing else."""
             # Expected format: [{"vulnerability": "...", "option_for_consideration": "...", "confidence_score": <float>}]
             try:
                 parsed = json.loads(result_text)
-                
+            
                 # Handle array response (new schema format)
                 if isinstance(parsed, list):
                     # Each item in the array is a vulnerability-OFC pair
@@ -525,15 +574,30 @@ Remember: Return ONLY valid JSON, nothing else."""
                 "status": "failed"
             })
             continue
+        except (AttributeError, TypeError) as e:
+            # Malformed chunk or model response shape (e.g. non-object array items) - log and continue
+            logger.error(f"Malformed chunk or response for chunk {chunk_id}: {e}")
+            results.append({
+                "chunk_id": chunk_id,
+                "error": f"Malformed chunk or response: {e}",
+                "status": "failed"
+            })
+            continue
         except Exception as e:
-            # Unexpected error - log with full context and continue
-            logger.error(f"Unexpected error processing chunk {chunk.get('chunk_id', idx)}: {e}", exc_info=True)
+            # Unexpected error - record the failed chunk and keep the other chunks' results
+            logger.error(f"Unexpected error processing chunk {idx} of {len(chunks)} ({chunk_id}): {e}", exc_info=True)
             results.append({
-                "chunk_id": chunk.get('chunk_id', f'chunk_{idx}'),
+                "chunk_id": chunk_id,
                 "error": f"Unexpected error: {e}",
                 "status": "failed"
             })
+            unexpected_errors += 1
+            last_error = e
             continue
     
+    # Only give up on the whole batch when no chunk produced a result
+    if unexpected_errors and all(r.get("status") == "failed" for r in results):
+        raise ServiceError(f"Chunk processing failed for all {len(chunks)} chunks: {last_error}") from last_error
+    
     return results
 
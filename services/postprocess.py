@@ -7,14 +7,57 @@ import re
 import json
 import os
 import logging
+import heapq
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from difflib import SequenceMatcher
+from functools import lru_cache
 from pathlib import Path
 from config import Config
+
+try:
+    from rapidfuzz import fuzz, process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+try:
+    from datasketch import MinHash, MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    from services.ai_enhancer import (
+        ai_should_merge,
+        ai_classify_domain,
+        ai_generate_implied_vulnerability,
+        ai_assess_quality
+    )
+    AI_ENHANCER_AVAILABLE = True
+except ImportError:
+    AI_ENHANCER_AVAILABLE = False
+
 from services.supabase_client import (
-    get_discipline_record
+    get_discipline_record,
+    get_supabase_client
 )
 from services.processor.normalization.discipline_resolver import (
     resolve_discipline_and_subtype,
+    get_normalized_discipline_record,
+    clear_discipline_caches,
     get_subtype_id
 )
 
@@ -23,9 +66,23 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+_WS_RE = re.compile(r'\s+')
+
+# Normalized comparison keys written onto records by postprocess_results and
+# removed again before the records are returned
+_NORM_KEYS = ("_vuln_norm", "_cat_norm", "_ofc_norm_joined")
+
+
+@lru_cache(maxsize=8192)
+def _normalize_str(s: str) -> str:
+    return _WS_RE.sub(' ', s.strip().lower())
+
+
 def normalize_text(s: str) -> str:
     """
     Normalize text for comparison (lowercase, strip, collapse whitespace).
+    Results for plain strings are cached, since the same vulnerability,
+    category and OFC text is normalized repeatedly during merging.
     
     Args:
         s: Input string
@@ -35,82 +92,191 @@ def normalize_text(s: str) -> str:
     """
     if not s:
         return ''
-    return re.sub(r'\s+', ' ', s.strip().lower())
+    if type(s) is not str:
+        return _WS_RE.sub(' ', s.strip().lower())
+    return _normalize_str(s)
+
+
+# MinHash-LSH blocking for merge_similar_duplicates: only used for large record sets,
+# where the N x N score matrix gets too big (about 36 MB at 3000 records).
+# Short shingles and a low Jaccard threshold keep pairs at the 0.8 ratio threshold as
+# candidates even with several edited words; candidates are still scored exactly
+LSH_MIN_RECORDS = Config.MERGE_LSH_MIN_RECORDS
+LSH_NUM_PERM = 128
+LSH_JACCARD_THRESHOLD = 0.3
+LSH_SHINGLE_SIZE = 3
+
+
+def _lsh_candidates(texts):
+    """
+    Find candidate duplicate pairs with MinHash-LSH over character shingles.
+    
+    Args:
+        texts: List of normalized vulnerability texts
+        
+    Returns:
+        Dict mapping each index to the sorted later indices sharing an LSH bucket with it
+    """
+    lsh = MinHashLSH(threshold=LSH_JACCARD_THRESHOLD, num_perm=LSH_NUM_PERM)
+    minhashes = []
+    for idx, text in enumerate(texts):
+        mh = MinHash(num_perm=LSH_NUM_PERM)
+        for k in range(max(len(text) - LSH_SHINGLE_SIZE + 1, 1)):
+            mh.update(text[k:k + LSH_SHINGLE_SIZE].encode("utf-8"))
+        lsh.insert(idx, mh)
+        minhashes.append(mh)
+    return {idx: sorted(j for j in lsh.query(mh) if j > idx) for idx, mh in enumerate(minhashes)}
+
+
+def _confidence_of(rec):
+    """Numeric confidence_score of a record (0.5 if missing or not numeric)."""
+    try:
+        return float(rec.get("confidence_score", 0.5))
+    except (TypeError, ValueError):
+        return 0.5
 
 
 def merge_similar_duplicates(records, similarity_threshold=0.8):
     """
     Merge duplicates if vulnerability text is ≥80% similar and category matches.
+    Records are compared highest-confidence first, so each merged group is based
+    on its most confident record; the output keeps the input order.
     
     Args:
         records: List of cleaned records
         similarity_threshold: Minimum similarity ratio (default: 0.8)
         
     Returns:
-        List of merged records
+        List of merged records, in input order (each group at the position of its first record)
     """
     if not records:
         return records
     
-    merged = []
-    seen_indices = set()
+    # Compare in descending confidence (stable: equal confidences keep their input order);
+    # order[k] is the input index of records[k], used to restore the input order at the end
+    order = sorted(range(len(records)), key=lambda k: _confidence_of(records[k]), reverse=True)
+    records = [records[k] for k in order]
+    
+    # Union-find over record indices: similar pairs are joined into one cluster,
+    # so chains of near-duplicates (A~B, B~C) merge even when A and C differ more.
+    # A cluster never spans two different explicit categories (see cluster_cat below)
+    parent = list(range(len(records)))
+    
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    
+    # Without AI, narrow the comparisons up front: large record sets only compare
+    # LSH candidate pairs, otherwise every pair is scored in one vectorized rapidfuzz call.
+    # The AI path decides per pair, so it keeps the full pairwise loop below
+    ai_enabled = Config.ENABLE_AI_ENHANCEMENT and AI_ENHANCER_AVAILABLE
+    score_matrix = None
+    candidates = None
+    if not ai_enabled:
+        vulns = [r.get("_vuln_norm") or normalize_text(r.get("vulnerability", "")) for r in records]
+        if DATASKETCH_AVAILABLE and len(records) >= LSH_MIN_RECORDS:
+            candidates = _lsh_candidates(vulns)
+        elif RAPIDFUZZ_AVAILABLE:
+            score_matrix = process.cdist(vulns, vulns, scorer=fuzz.ratio, processor=None, workers=-1)
+    
+    # Bucket record indices by category: a categorized record only needs comparing with
+    # its own category and with uncategorized records (which may match any category)
+    cats = [r.get("_cat_norm") or normalize_text(r.get("category", "")) for r in records]
+    buckets = {}
+    for idx, cat in enumerate(cats):
+        buckets.setdefault(cat, []).append(idx)
+    uncategorized = buckets.get("", [])
+    
+    # Category of each cluster, tracked on its root: "" until a categorized record joins.
+    # Uncategorized records may bridge records, but only within one category
+    cluster_cat = list(cats)
     
     for i, rec1 in enumerate(records):
-        if i in seen_indices:
-            continue
+        cat1 = cats[i]
+        if candidates is not None:
+            later = candidates[i]
+        elif cat1:
+            same_cat = buckets[cat1]
+            later = heapq.merge(
+                same_cat[bisect_right(same_cat, i):],
+                uncategorized[bisect_right(uncategorized, i):]
+            )
+        else:
+            later = range(i + 1, len(records))
         
-        # Find similar records
-        similar_group = [rec1]
-        for j, rec2 in enumerate(records[i+1:], start=i+1):
-            if j in seen_indices:
+        for j in later:
+            root_i, root_j = find(i), find(j)
+            # Already in the same cluster - no need to compare again
+            if root_i == root_j:
                 continue
+            rec2 = records[j]
             
-            # Check if categories match
-            cat1 = normalize_text(rec1.get("category", ""))
-            cat2 = normalize_text(rec2.get("category", ""))
-            if cat1 and cat2 and cat1 != cat2:
+            # Check if categories match - for the whole clusters, not just this pair
+            cat_i, cat_j = cluster_cat[root_i], cluster_cat[root_j]
+            if cat_i and cat_j and cat_i != cat_j:
                 continue
             
             # Use AI to determine if records should be merged (with fallback to text similarity)
             should_merge = False
-            import os
-            use_ai = Config.ENABLE_AI_ENHANCEMENT
+            use_ai = ai_enabled
             
             if use_ai:
                 try:
-                    from services.ai_enhancer import ai_should_merge
                     merge_decision = ai_should_merge(rec1, rec2)
                     should_merge = merge_decision.get("should_merge", False)
                     
                     if should_merge and merge_decision.get("merged_suggestion"):
                         # Use AI-suggested merged text
                         rec1["vulnerability"] = merge_decision["merged_suggestion"]
+                        rec1["_vuln_norm"] = normalize_text(rec1["vulnerability"])
                 except Exception as e:
                     logger.debug(f"AI merge decision failed, using text similarity: {e}")
                     use_ai = False
             
             # Fallback to text similarity
             if not use_ai:
-                vuln1 = normalize_text(rec1.get("vulnerability", ""))
-                vuln2 = normalize_text(rec2.get("vulnerability", ""))
+                vuln1 = rec1.get("_vuln_norm") or normalize_text(rec1.get("vulnerability", ""))
+                vuln2 = rec2.get("_vuln_norm") or normalize_text(rec2.get("vulnerability", ""))
                 page1 = rec1.get("page_ref") or rec1.get("source_page") or rec1.get("chunk_id", "")
                 page2 = rec2.get("page_ref") or rec2.get("source_page") or rec2.get("chunk_id", "")
                 
                 if vuln1 and vuln2:
-                    similarity = SequenceMatcher(None, vuln1, vuln2).ratio()
-                    
                     # Prefer merging records from same page/section (more likely to be true duplicates)
                     # But still allow cross-page merging if similarity is very high (≥0.9)
                     same_location = page1 and page2 and (page1 == page2 or str(page1) == str(page2))
                     location_bonus = 0.1 if same_location else 0.0
                     effective_threshold = similarity_threshold - location_bonus  # Lower threshold for same-page matches
                     
+                    if score_matrix is not None:
+                        similarity = score_matrix[i][j] / 100.0
+                    elif 2 * min(len(vuln1), len(vuln2)) < effective_threshold * (len(vuln1) + len(vuln2)):
+                        # The length difference alone caps the ratio below the threshold
+                        similarity = 0.0
+                    elif RAPIDFUZZ_AVAILABLE:
+                        similarity = fuzz.ratio(vuln1, vuln2, score_cutoff=effective_threshold * 100) / 100.0
+                    else:
+                        # autojunk=False: boilerplate-heavy text otherwise gets junked and scored too low.
+                        # quick_ratio() is an upper bound, so skip ratio() when it cannot reach the threshold
+                        matcher = SequenceMatcher(None, vuln1, vuln2, autojunk=False)
+                        similarity = matcher.ratio() if matcher.quick_ratio() >= effective_threshold else 0.0
+                    
                     should_merge = similarity >= effective_threshold
             
             if should_merge:
-                similar_group.append(rec2)
-                seen_indices.add(j)
-        
+                parent[root_j] = root_i
+                cluster_cat[root_i] = cat_i or cat_j
+    
+    # Group records by cluster (most confident first within each cluster), then emit
+    # the clusters in input order of their earliest record
+    clusters = {}
+    for idx in range(len(records)):
+        clusters.setdefault(find(idx), []).append(idx)
+    
+    merged = []
+    for group in sorted(clusters.values(), key=lambda group: min(order[idx] for idx in group)):
+        similar_group = [records[idx] for idx in group]
         # Merge similar records
         if len(similar_group) > 1:
             # Merge OFCs from all similar records
@@ -131,16 +297,19 @@ def merge_similar_duplicates(records, similarity_threshold=0.8):
                     seen_ofcs.add(ofc_norm)
                     unique_ofcs.append(ofc)
             
-            # Use the first record as base, merge OFCs
+            # Use the first (highest-confidence) record as base, merge OFCs
             merged_rec = similar_group[0].copy()
             merged_rec["options_for_consideration"] = unique_ofcs
-            merged_rec["confidence_score"] = max([r.get("confidence_score", 0.5) for r in similar_group])
+            if "_ofc_norm_joined" in merged_rec:
+                # Keep the pre-normalized OFC text in step with the merged OFC list
+                merged_rec["_ofc_norm_joined"] = " ".join(
+                    rec["_ofc_norm_joined"] for rec in similar_group if rec.get("_ofc_norm_joined")
+                )
+            merged_rec["confidence_score"] = similar_group[0].get("confidence_score", 0.5)
             merged.append(merged_rec)
             logger.debug(f"Merged {len(similar_group)} similar records")
         else:
-            merged.append(rec1)
-        
-        seen_indices.add(i)
+            merged.append(similar_group[0])
     
     if len(merged) < len(records):
         logger.info(f"Merged {len(records)} records into {len(merged)} unique records (similarity threshold: {similarity_threshold})")
@@ -166,19 +335,24 @@ def promote_orphaned_ofcs(records):
         ofcs = rec.get("options_for_consideration", [])
         
         if not vuln and ofcs:
-            # This is an orphaned OFC - promote it to a design consideration
+            # This is an orphaned OFC - promote it to a design consideration.
+            # Fields shared by every OFC from this record are built once
+            template = {
+                "category": rec.get("category") or "Design Process",
+                "discipline": rec.get("discipline") or "General Security",
+                "confidence_score": rec.get("confidence_score", 0.5),
+                "source": rec.get("source"),
+                "page_ref": rec.get("page_ref"),
+                "chunk_id": rec.get("chunk_id"),
+                "source_file": rec.get("source_file"),
+            }
             for ofc in ofcs:
                 if isinstance(ofc, str) and ofc.strip():
+                    ofc_text = ofc.strip()
                     orphaned_ofcs.append({
-                        "vulnerability": f"Design consideration: {ofc.strip()}",
-                        "options_for_consideration": [ofc.strip()],
-                        "category": rec.get("category") or "Design Process",
-                        "discipline": rec.get("discipline") or "General Security",
-                        "confidence_score": rec.get("confidence_score", 0.5),
-                        "source": rec.get("source"),
-                        "page_ref": rec.get("page_ref"),
-                        "chunk_id": rec.get("chunk_id"),
-                        "source_file": rec.get("source_file"),
+                        "vulnerability": f"Design consideration: {ofc_text}",
+                        "options_for_consideration": [ofc_text],
+                        **template,
                     })
         else:
             promoted.append(rec)
@@ -202,28 +376,32 @@ def add_domain_defaults(records):
     Returns:
         List of records with domain defaults applied
     """
-    import os
-    
     # Check if AI enhancement is enabled
-    use_ai = Config.ENABLE_AI_ENHANCEMENT
+    use_ai = Config.ENABLE_AI_ENHANCEMENT and AI_ENHANCER_AVAILABLE
     
     if use_ai:
         try:
-            from services.ai_enhancer import ai_classify_domain
+            # Skip if category already set with high confidence
+            pending = [
+                rec for rec in records
+                if not (rec.get("category") and rec.get("category_confidence", 1.0) >= 0.8)
+            ]
             
-            for rec in records:
-                # Skip if category already set with high confidence
-                if rec.get("category") and rec.get("category_confidence", 1.0) >= 0.8:
-                    continue
-                
-                vuln_text = normalize_text(rec.get("vulnerability", ""))
-                ofcs = rec.get("options_for_consideration", [])
-                ofc_text = " ".join([normalize_text(str(o)) for o in ofcs if o])
+            def classify(rec):
+                vuln_text = rec.get("_vuln_norm") or normalize_text(rec.get("vulnerability", ""))
+                ofc_text = rec.get("_ofc_norm_joined") or " ".join(
+                    normalize_text(str(o)) for o in rec.get("options_for_consideration", []) if o
+                )
                 source_context = rec.get("source_context", "")[:500]
                 
                 # Use AI classification
-                domain_result = ai_classify_domain(vuln_text, ofc_text, source_context)
-                
+                return vuln_text, ofc_text, ai_classify_domain(vuln_text, ofc_text, source_context)
+            
+            # Each classification is an independent model round-trip, so issue them concurrently
+            with ThreadPoolExecutor(max_workers=Config.AI_CONCURRENCY) as executor:
+                classified = list(executor.map(classify, pending))
+            
+            for rec, (vuln_text, ofc_text, domain_result) in zip(pending, classified):
                 if domain_result.get("category"):
                     rec["category"] = domain_result["category"]
                     rec["category_confidence"] = domain_result.get("confidence", 0.5)
@@ -242,35 +420,52 @@ def add_domain_defaults(records):
             if rec.get("category"):
                 continue
             
-            vuln_text = normalize_text(rec.get("vulnerability", ""))
-            ofcs = rec.get("options_for_consideration", [])
-            ofc_text = " ".join([normalize_text(str(o)) for o in ofcs if o])
+            vuln_text = rec.get("_vuln_norm") or normalize_text(rec.get("vulnerability", ""))
+            ofc_text = rec.get("_ofc_norm_joined") or " ".join(
+                normalize_text(str(o)) for o in rec.get("options_for_consideration", []) if o
+            )
             
             _apply_keyword_domain(rec, vuln_text, ofc_text)
     
     return records
 
 
+# Placeholder/dummy markers rejected in vulnerability and OFC text (substring match).
+# NOTE: Do NOT include "implied design weakness", "missing standard", or "gap in planning"
+# These are legitimate system-generated text, not fake data
+_PLACEHOLDER_RE = re.compile(r"placeholder|dummy|test|example|sample|fake", re.IGNORECASE)
+
+# First page number in a page_ref / page_range value
+_PAGE_NUM_RE = re.compile(r'\d+')
+
+# Domain keywords in priority order (first domain with a matching keyword wins)
+DOMAIN_KEYWORDS = {
+    "Perimeter": ("bollard", "barrier", "fence", "perimeter", "standoff", "glazing", "blast", "ram", "vehicular"),
+    "Access Control": ("access control", "visitor", "screening", "credential", "badge", "entry", "gate"),
+    "Operations": ("inspection", "drill", "exercise", "evacuation", "lockdown", "sop", "procedure", "training"),
+    "Design Process": ("design", "planning", "program", "phase", "concept", "schematic"),
+    "Community Integration": ("community", "public", "stakeholder", "engagement", "outreach"),
+    "Sustainability": ("sustainability", "green", "energy", "environmental", "leed")
+}
+
+# Single-pass check for "any keyword at all" so unmatched records skip the per-keyword scan
+_DOMAIN_KEYWORD_RE = re.compile(
+    "|".join(re.escape(kw) for keywords in DOMAIN_KEYWORDS.values() for kw in keywords)
+)
+
+
 def _apply_keyword_domain(rec, vuln_text, ofc_text):
     """Helper function for keyword-based domain classification (fallback)."""
-    domain_keywords = {
-        "Perimeter": ["bollard", "barrier", "fence", "perimeter", "standoff", "glazing", "blast", "ram", "vehicular"],
-        "Access Control": ["access control", "visitor", "screening", "credential", "badge", "entry", "gate"],
-        "Operations": ["inspection", "drill", "exercise", "evacuation", "lockdown", "sop", "procedure", "training"],
-        "Design Process": ["design", "planning", "program", "phase", "concept", "schematic"],
-        "Community Integration": ["community", "public", "stakeholder", "engagement", "outreach"],
-        "Sustainability": ["sustainability", "green", "energy", "environmental", "leed"]
-    }
-    
     combined_text = f"{vuln_text} {ofc_text}".lower()
     
-    for domain, keywords in domain_keywords.items():
-        for keyword in keywords:
-            if keyword in combined_text:
-                rec["category"] = domain
-                rec["category_confidence"] = 0.6  # Lower confidence for keyword-based
-                logger.debug(f"Keyword assigned domain '{domain}' based on '{keyword}'")
-                return
+    if _DOMAIN_KEYWORD_RE.search(combined_text):
+        for domain, keywords in DOMAIN_KEYWORDS.items():
+            for keyword in keywords:
+                if keyword in combined_text:
+                    rec["category"] = domain
+                    rec["category_confidence"] = 0.6  # Lower confidence for keyword-based
+                    logger.debug(f"Keyword assigned domain '{domain}' based on '{keyword}'")
+                    return
     
     # Default to "Design Process" if no match
     if not rec.get("category"):
@@ -278,6 +473,17 @@ def _apply_keyword_domain(rec, vuln_text, ofc_text):
         rec["category_confidence"] = 0.5
 
 
+def _dedupe_key(*parts):
+    """
+    Build a dedupe key from normalized text parts.
+    With xxhash installed this is a 64-bit int, so the seen-set doesn't hold
+    copies of every normalized string; otherwise the parts themselves are the key.
+    """
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_intdigest("\x00".join(parts).encode("utf-8"))
+    return parts
+
+
 def dedupe_results(results):
     """
     Remove duplicate results based on normalized vulnerability text and OFC text.
@@ -310,7 +516,7 @@ def dedupe_results(results):
         
         # Create deduplication key from both vulnerability and OFC
         if vuln_text and ofc_text:
-            key = (normalize_text(vuln_text), normalize_text(ofc_text))
+            key = _dedupe_key(r.get("_vuln_norm") or normalize_text(vuln_text), normalize_text(ofc_text))
             if key not in seen:
                 seen.add(key)
                 unique.append(r)
@@ -318,11 +524,12 @@ def dedupe_results(results):
                 logger.debug(f"Skipping duplicate vulnerability+OFC pair: {vuln_text[:50]}... / {ofc_text[:50]}...")
         elif vuln_text:
             # Fallback to vulnerability-only deduplication
-            key = normalize_text(vuln_text)
-            if key and key not in seen:
+            vuln_norm = r.get("_vuln_norm") or normalize_text(vuln_text)
+            key = _dedupe_key(vuln_norm)
+            if vuln_norm and key not in seen:
                 seen.add(key)
                 unique.append(r)
-            elif key:
+            elif vuln_norm:
                 logger.debug(f"Skipping duplicate vulnerability: {vuln_text[:50]}...")
         else:
             logger.warning(f"Skipping record with no vulnerability text: {r}")
@@ -335,6 +542,9 @@ def resolve_discipline(name: str):
     """
     Resolve discipline name to (discipline_id, category) using Supabase lookup.
     Uses fuzzy matching as fallback if exact match not found.
+    Resolved names are memoized until invalidate_discipline_cache() (i.e. for the
+    current document), since its records usually repeat the same few discipline
+    names. Misses are not memoized, so a failed lookup is retried.
     
     Args:
         name: Discipline name to resolve
@@ -342,6 +552,58 @@ def resolve_discipline(name: str):
     Returns:
         Tuple of (discipline_id, category) or (None, None) if not found
     """
+    if not name or not isinstance(name, str):
+        return None, None
+    
+    normalized_name = normalize_text(name)
+    resolved = _RESOLVED_DISCIPLINES.get(normalized_name)
+    if resolved is None:
+        resolved = _resolve_discipline_uncached(normalized_name)
+        if resolved[0]:
+            _RESOLVED_DISCIPLINES[normalized_name] = resolved
+    return resolved
+
+
+# normalized name -> (discipline_id, category) for names resolved since the last
+# invalidate_discipline_cache(); only successful resolutions are stored
+_RESOLVED_DISCIPLINES = {}
+
+# (normalized_name, record) pairs for all active disciplines; fetched on the first
+# fuzzy lookup and reused until invalidate_discipline_cache() is called, which
+# postprocess_results does at the start of every document
+_ALL_DISCIPLINES_CACHE = None
+
+
+def _get_discipline_choices():
+    """Return the cached (normalized_name, record) pairs, fetching them on first use."""
+    global _ALL_DISCIPLINES_CACHE
+    if _ALL_DISCIPLINES_CACHE is None:
+        all_discs = get_discipline_record(all=True)
+        if not all_discs:
+            # Don't cache an empty result - retry on the next lookup
+            return []
+        _ALL_DISCIPLINES_CACHE = [
+            (normalize_text(d.get('name', '')), d) for d in all_discs if d.get('name')
+        ]
+    return _ALL_DISCIPLINES_CACHE
+
+
+def invalidate_discipline_cache():
+    """
+    Drop cached discipline lookups so the next resolution re-reads Supabase.
+    Called at the start of every postprocess_results run, so discipline changes
+    made through the web app (add, rename, deactivate) apply from the next document.
+    Cached sector/subsector ids are dropped as well (see clear_taxonomy_id_cache).
+    """
+    global _ALL_DISCIPLINES_CACHE
+    _ALL_DISCIPLINES_CACHE = None
+    _RESOLVED_DISCIPLINES.clear()
+    clear_discipline_caches()
+    clear_taxonomy_id_cache()
+
+
+def _resolve_discipline_uncached(name: str):
+    """Uncached body of resolve_discipline; name is already normalized."""
     if not name:
         return None, None
     
@@ -353,27 +615,35 @@ def resolve_discipline(name: str):
     
     # Try fuzzy match fallback
     logger.info(f"No exact match for discipline '{name}', trying fuzzy match...")
-    all_discs = get_discipline_record(all=True)
+    choices = _get_discipline_choices()
     
-    if not all_discs:
+    if not choices:
         logger.warning(f"No disciplines available for fuzzy matching")
         return None, None
     
     best = None
     best_score = 0.0
-    normalized_name = normalize_text(name)
     
-    for d in all_discs:
-        disc_name = d.get('name', '')
-        if not disc_name:
-            continue
-        
-        normalized_disc = normalize_text(disc_name)
-        score = SequenceMatcher(None, normalized_disc, normalized_name).ratio()
+    if RAPIDFUZZ_AVAILABLE:
+        match = process.extractOne(name, [disc_name for disc_name, _ in choices], scorer=fuzz.ratio, processor=None)
+        if match and match[1] > 0:
+            best = choices[match[2]][1]
+            best_score = match[1] / 100.0
+    else:
+        # SequenceMatcher caches its analysis of seq2, so set the query once and vary seq1
+        matcher = SequenceMatcher(None, autojunk=False)
+        matcher.set_seq2(name)
         
-        if score > best_score:
-            best = d
-            best_score = score
+        for normalized_disc, d in choices:
+            matcher.set_seq1(normalized_disc)
+            # quick_ratio() bounds ratio() from above - skip candidates that cannot beat the current best
+            if matcher.quick_ratio() <= best_score:
+                continue
+            score = matcher.ratio()
+            
+            if score > best_score:
+                best = d
+                best_score = score
     
     if best_score >= 0.7:  # 70% similarity threshold
         logger.info(f"Fuzzy match found: '{name}' -> '{best.get('name')}' (score: {best_score:.2f})")
@@ -383,6 +653,61 @@ def resolve_discipline(name: str):
     return None, None
 
 
+@lru_cache(maxsize=8)
+def _load_heuristics(path: str, mtime: float) -> dict:
+    """
+    Parse a heuristics JSON file (orjson when available).
+    mtime is part of the cache key, so an edited file is re-read on the next call.
+    The returned dict is shared between calls and must not be modified.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# (table, column, value) -> row id for sector/subsector lookups that found a row.
+# Misses are not cached, and the cache is cleared before each document, so added,
+# renamed or deleted rows take effect from the next document
+_TAXONOMY_ID_CACHE = {}
+TAXONOMY_ID_CACHE_SIZE = 256
+
+
+def clear_taxonomy_id_cache():
+    """Drop cached sector/subsector ids so the next lookup re-reads Supabase."""
+    _TAXONOMY_ID_CACHE.clear()
+
+
+def _lookup_taxonomy_id(table: str, column: str, value: str):
+    """
+    Look up a sector/subsector row id by exact column value.
+    Found ids are cached until clear_taxonomy_id_cache() (once per document), so
+    records of the same document don't repeat the round-trip; misses and lookup
+    errors are not cached.
+    
+    Args:
+        table: Table name ("sectors" or "subsectors")
+        column: Column to match on
+        value: Value to match
+        
+    Returns:
+        Row id, or None if no row matches
+    """
+    key = (table, column, value)
+    row_id = _TAXONOMY_ID_CACHE.get(key)
+    if row_id:
+        return row_id
+    
+    result = get_supabase_client().table(table).select("id").eq(column, value).maybe_single().execute()
+    row_id = result.data.get("id") if result and result.data else None
+    if row_id:
+        if len(_TAXONOMY_ID_CACHE) >= TAXONOMY_ID_CACHE_SIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            del _TAXONOMY_ID_CACHE[next(iter(_TAXONOMY_ID_CACHE))]
+        _TAXONOMY_ID_CACHE[key] = row_id
+    return row_id
+
+
 def postprocess_results(model_results, source_filepath=None, min_confidence=0.4):
     """
     Post-process model results: clean, normalize, resolve taxonomy, and deduplicate.
@@ -395,12 +720,18 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
     Returns:
         List of cleaned and validated records ready for Supabase insertion
     """
-    import os
     # Get confidence threshold from environment or use default (LOWERED to 0.3 to capture more)
     min_confidence = Config.CONFIDENCE_THRESHOLD
+    use_ai = Config.ENABLE_AI_ENHANCEMENT and AI_ENHANCER_AVAILABLE
+    if Config.ENABLE_AI_ENHANCEMENT and not AI_ENHANCER_AVAILABLE:
+        logger.warning("ENABLE_AI_ENHANCEMENT is set but services.ai_enhancer is not available - using rule-based processing")
     
     logger.info(f"Starting post-processing for {len(model_results)} model results (min_confidence={min_confidence})")
     
+    # Discipline and sector/subsector lookups are cached for this document only - those
+    # tables are edited from the web app while this process keeps running
+    invalidate_discipline_cache()
+    
     # Load expanded heuristics if available
     heuristics = {}
     heur_path = os.path.join(
@@ -418,10 +749,14 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
             os.environ["VOFC_HEURISTICS_MODE"] = "design_guidance_expanded"
     
     # Load heuristics file if it exists
-    if os.path.exists(heur_path):
+    try:
+        heur_mtime = os.path.getmtime(heur_path)
+    except OSError:
+        heur_mtime = None
+    
+    if heur_mtime is not None:
         try:
-            with open(heur_path, "r", encoding="utf-8") as f:
-                heuristics = json.load(f)
+            heuristics = _load_heuristics(heur_path, heur_mtime)
             logger.info(f"Loaded heuristics: {heuristics.get('mode', 'default')}")
         except Exception as e:
             logger.warning(f"Could not load heuristics from {heur_path}: {e}")
@@ -431,6 +766,9 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
     # DOCUMENT-LEVEL CLASSIFICATION: Use DocumentClassifier to determine sector/subsector ONCE for the entire document
     # This ensures all records from the same document have the same sector/subsector
     document_title = source_filepath.name if source_filepath else ""
+    # Probe the source file once; the classification and citation blocks below reuse these
+    source_exists = bool(source_filepath) and source_filepath.is_file()
+    source_is_pdf = source_exists and source_filepath.suffix.lower() == '.pdf'
     document_sector_id = None
     document_subsector_id = None
     
@@ -447,27 +785,30 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
             first_pages_text = ""
             pdf_metadata = None
             full_text = None
+            page_text = {}  # page_number -> page_text, shared with the citation extractor below
             
-            if source_filepath and source_filepath.exists():
+            if source_exists:
                 try:
-                    # Try to extract first 2-3 pages from PDF
+                    # Open the PDF once: the first 10 pages feed the classifier, and for
+                    # PDFs the remaining pages are added for the citation extractor below
                     import fitz  # PyMuPDF
-                    doc = fitz.open(str(source_filepath))
-                    first_pages = []
-                    for i, page in enumerate(doc[:3]):  # First 3 pages
-                        first_pages.append(page.get_text())
-                    first_pages_text = "\n".join(first_pages)
-                    
-                    # Extract PDF metadata
-                    pdf_metadata = doc.metadata if hasattr(doc, 'metadata') else None
-                    
-                    # Extract full text (truncated for performance)
-                    full_text_parts = []
-                    for page in doc[:10]:  # First 10 pages for context
-                        full_text_parts.append(page.get_text())
-                    full_text = "\n".join(full_text_parts)
-                    
-                    doc.close()
+                    with fitz.open(str(source_filepath)) as doc:
+                        first_pages = [doc[i].get_text() for i in range(min(10, len(doc)))]
+                        first_pages_text = "\n".join(first_pages[:3])  # First 3 pages
+                        # Extract full text (truncated for performance)
+                        full_text = "\n".join(first_pages)  # First 10 pages for context
+                        
+                        # Extract PDF metadata
+                        pdf_metadata = doc.metadata if hasattr(doc, 'metadata') else None
+                        
+                        if source_is_pdf:
+                            try:
+                                page_text = {i + 1: text for i, text in enumerate(first_pages)}  # 1-indexed
+                                for page_num in range(len(first_pages), len(doc)):
+                                    page_text[page_num + 1] = doc[page_num].get_text()
+                            except Exception as e:
+                                logger.debug(f"Could not extract PDF pages for citation extraction: {e}")
+                                page_text = {}
                 except Exception as e:
                     logger.debug(f"Could not extract PDF content for classification: {e}")
                     # Continue with just title
@@ -496,37 +837,22 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
             # Resolve subsector ID to UUID (ONCE, not per record)
             if subsector_id_from_vocab:
                 try:
-                    from services.supabase_client import get_supabase_client
-                    client = get_supabase_client()
-                    
                     # Try direct UUID lookup first (if vocab has UUID)
-                    subsector_result = client.table("subsectors").select("id").eq("id", str(subsector_id_from_vocab)).maybe_single().execute()
-                    if subsector_result.data:
-                        document_subsector_id = subsector_result.data.get("id")
-                    elif subsector_name_from_vocab:
+                    document_subsector_id = _lookup_taxonomy_id("subsectors", "id", str(subsector_id_from_vocab))
+                    if not document_subsector_id and subsector_name_from_vocab:
                         # Fallback: lookup by name (no .ilike - use exact match to avoid 406)
-                        # Try exact match first
-                        subsector_result = client.table("subsectors").select("id").eq("name", subsector_name_from_vocab).maybe_single().execute()
-                        if subsector_result.data:
-                            document_subsector_id = subsector_result.data.get("id")
+                        document_subsector_id = _lookup_taxonomy_id("subsectors", "name", subsector_name_from_vocab)
                 except Exception as e:
                     logger.warning(f"Could not resolve subsector ID '{subsector_id_from_vocab}': {e}")
             
             # Resolve sector ID to UUID (ONCE, not per record)
             if sector_id_from_vocab:
                 try:
-                    from services.supabase_client import get_supabase_client
-                    client = get_supabase_client()
-                    
                     # Try direct UUID lookup first
-                    sector_result = client.table("sectors").select("id").eq("id", str(sector_id_from_vocab)).maybe_single().execute()
-                    if sector_result.data:
-                        document_sector_id = sector_result.data.get("id")
-                    else:
+                    document_sector_id = _lookup_taxonomy_id("sectors", "id", str(sector_id_from_vocab))
+                    if not document_sector_id:
                         # Fallback: lookup by sector_name (no .ilike - use exact match)
-                        sector_result = client.table("sectors").select("id").eq("sector_name", str(sector_id_from_vocab)).maybe_single().execute()
-                        if sector_result.data:
-                            document_sector_id = sector_result.data.get("id")
+                        document_sector_id = _lookup_taxonomy_id("sectors", "sector_name", str(sector_id_from_vocab))
                 except Exception as e:
                     logger.warning(f"Could not resolve sector ID '{sector_id_from_vocab}': {e}")
             
@@ -540,40 +866,22 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
                 from services.processor.normalization.citation_extractor_v2 import CitationExtractorV2
                 from services.processor.normalization.pdf_structure import build_document_structure
                 
-                # Build page_map and page_text from PDF if available
+                # Build page_map from model_results; page_text was extracted above
                 page_map = {}  # chunk_index -> page_number
-                page_text = {}  # page_number -> page_text
                 
-                if source_filepath and source_filepath.exists() and source_filepath.suffix.lower() == '.pdf':
+                if source_is_pdf:
                     try:
-                        import fitz  # PyMuPDF
-                        doc = fitz.open(str(source_filepath))
-                        
-                        # Extract all page text
-                        for page_num in range(len(doc)):
-                            page = doc[page_num]
-                            page_text[page_num + 1] = page.get_text()  # 1-indexed
-                        
-                        # Build chunk_index -> page_number map from model_results
-                        # Try to infer from chunk_id or page_ref
-                        for idx, record in enumerate(model_results):
-                            chunk_id = record.get("chunk_id", "")
-                            page_ref = record.get("page_ref") or record.get("page_range", "")
-                            
-                            # Try to extract page number from page_ref (e.g., "23" or "23-25")
-                            page_num = None
-                            if page_ref:
-                                # Try to parse page number from page_ref
-                                import re
-                                page_match = re.search(r'(\d+)', str(page_ref))
-                                if page_match:
-                                    page_num = int(page_match.group(1))
-                            
-                            # If we have a page number, map chunk index to it
-                            if page_num:
-                                page_map[idx] = page_num
-                        
-                        doc.close()
+                        # Build chunk_index -> page_number map from model_results, using the
+                        # first number in page_ref (e.g., "23" or "23-25")
+                        page_matches = (
+                            _PAGE_NUM_RE.search(str(record.get("page_ref") or record.get("page_range") or ""))
+                            for record in model_results
+                        )
+                        page_map = {
+                            idx: page_num
+                            for idx, match in enumerate(page_matches)
+                            if match and (page_num := int(match.group()))
+                        }
                         
                         # Build document structure and initialize citation extractor V2
                         if page_map and page_text:
@@ -637,11 +945,6 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
             
             # Handle list items that might be dicts - filter out empty/placeholder content
             ofcs = []
-            # NOTE: Do NOT include "implied design weakness", "missing standard", or "gap in planning"
-            # These are legitimate system-generated text, not fake data
-            placeholder_patterns = [
-                "placeholder", "dummy", "test", "example", "sample", "fake"
-            ]
             
             for o in ofcs_raw:
                 if isinstance(o, dict):
@@ -653,8 +956,7 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
                 if o and o.strip():
                     ofc_text = o.strip()
                     # Reject placeholder/dummy text in OFCs
-                    ofc_lower = ofc_text.lower()
-                    if any(pattern in ofc_lower for pattern in placeholder_patterns):
+                    if _PLACEHOLDER_RE.search(ofc_text):
                         logger.warning(f"Record {idx}: Skipping OFC with placeholder text: {ofc_text[:50]}...")
                         continue
                     # Reject very short OFCs (reduced from 5 to 3 chars to capture more valid short OFCs)
@@ -667,53 +969,37 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
             # BUT only if OFCs contain real, meaningful content
             if not vuln or not vuln.strip():
                 if ofcs and len(ofcs) > 0:
-                    # Validate that OFCs are not just placeholder text (reduced minimum from 5 to 3 chars)
-                    has_real_content = any(
-                        len(ofc) >= 3 and 
-                        not any(pattern in ofc.lower() for pattern in placeholder_patterns)
-                        for ofc in ofcs
-                    )
-                    
-                    if has_real_content:
-                        # Use AI to generate contextually appropriate implied vulnerability
-                        import os
-                        use_ai = Config.ENABLE_AI_ENHANCEMENT
-                        
-                        if use_ai:
-                            try:
-                                from services.ai_enhancer import ai_generate_implied_vulnerability
-                                
-                                ofc_text = " ".join([str(o) for o in ofcs[:2]])  # Use first 2 OFCs
-                                source_context = r.get("source_context", "")[:500]
-                                
-                                ai_result = ai_generate_implied_vulnerability(ofc_text, source_context)
-                                implied_text = ai_result.get("vulnerability", "")
-                                ai_confidence = ai_result.get("confidence", 0.5)
-                                
-                                if implied_text:
-                                    vuln = implied_text
-                                    # Store AI confidence for this implied vulnerability
-                                    r["implied_vulnerability_confidence"] = ai_confidence
-                                    r["implied_vulnerability_reasoning"] = ai_result.get("reasoning", "")
-                                    logger.debug(f"Record {idx}: AI generated implied vulnerability '{implied_text[:80]}...' (confidence: {ai_confidence:.2f})")
-                                else:
-                                    # Fallback to keyword-based
-                                    implied_text = _generate_keyword_implied_vulnerability(ofcs, heuristics)
-                                    vuln = implied_text
-                            except Exception as e:
-                                logger.warning(f"AI implied vulnerability generation failed, using keywords: {e}")
+                    # Every OFC in ofcs already passed the placeholder and length checks above
+                    # Use AI to generate contextually appropriate implied vulnerability
+                    if use_ai:
+                        try:
+                            ofc_text = " ".join([str(o) for o in ofcs[:2]])  # Use first 2 OFCs
+                            source_context = r.get("source_context", "")[:500]
+                            
+                            ai_result = ai_generate_implied_vulnerability(ofc_text, source_context)
+                            implied_text = ai_result.get("vulnerability", "")
+                            ai_confidence = ai_result.get("confidence", 0.5)
+                            
+                            if implied_text:
+                                vuln = implied_text
+                                # Store AI confidence for this implied vulnerability
+                                r["implied_vulnerability_confidence"] = ai_confidence
+                                r["implied_vulnerability_reasoning"] = ai_result.get("reasoning", "")
+                                logger.debug(f"Record {idx}: AI generated implied vulnerability '{implied_text[:80]}...' (confidence: {ai_confidence:.2f})")
+                            else:
+                                # Fallback to keyword-based
                                 implied_text = _generate_keyword_implied_vulnerability(ofcs, heuristics)
                                 vuln = implied_text
-                        else:
-                            # Use keyword-based generation
+                        except Exception as e:
+                            logger.warning(f"AI implied vulnerability generation failed, using keywords: {e}")
                             implied_text = _generate_keyword_implied_vulnerability(ofcs, heuristics)
                             vuln = implied_text
-                        
-                        logger.debug(f"Record {idx}: Using implied vulnerability '{implied_text[:80]}...' for OFC-only record with {len(ofcs)} real OFC(s)")
                     else:
-                        logger.warning(f"Record {idx}: Skipping - OFCs contain only placeholder text")
-                        skipped += 1
-                        continue
+                        # Use keyword-based generation
+                        implied_text = _generate_keyword_implied_vulnerability(ofcs, heuristics)
+                        vuln = implied_text
+                    
+                    logger.debug(f"Record {idx}: Using implied vulnerability '{implied_text[:80]}...' for OFC-only record with {len(ofcs)} real OFC(s)")
                 else:
                     logger.warning(f"Record {idx}: Skipping - no vulnerability text and no valid OFCs")
                     skipped += 1
@@ -739,8 +1025,7 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
                 ofcs = [f"Address {vuln[:100]}"]
 
             # Validate vulnerability text is not placeholder
-            vuln_lower = vuln.strip().lower()
-            if any(pattern in vuln_lower for pattern in placeholder_patterns):
+            if _PLACEHOLDER_RE.search(vuln):
                 logger.warning(f"Record {idx}: Skipping vulnerability with placeholder text: {vuln[:50]}...")
                 skipped += 1
                 continue
@@ -781,8 +1066,8 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
                 disc_id, category = resolve_discipline(discipline_name)
                 normalized_discipline = discipline_name
             else:
-                # Get category from discipline record
-                disc_record = get_discipline_record(normalized_discipline, fuzzy=True)
+                # Get category from discipline record (cached - same lookup the resolver just made)
+                disc_record = get_normalized_discipline_record(normalized_discipline)
                 category = disc_record.get('category') if disc_record else None
             
             # Get subtype_id if subtype was inferred
@@ -862,10 +1147,12 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
                 if field in r and r[field] is not None:
                     cleaned_record[field] = r[field]
             
-            # Get confidence score for filtering - use AI quality assessment if enabled
-            import os
-            use_ai = Config.ENABLE_AI_ENHANCEMENT
+            # Normalize once here; dedupe, merge and domain classification read these keys
+            cleaned_record["_vuln_norm"] = normalize_text(cleaned_record["vulnerability"])
+            cleaned_record["_cat_norm"] = normalize_text(cleaned_record.get("category") or "")
+            cleaned_record["_ofc_norm_joined"] = " ".join(normalize_text(o) for o in ofcs if isinstance(o, str) and o)
             
+            # Get confidence score for filtering - use AI quality assessment if enabled
             record_confidence = cleaned_record.get("confidence_score") or cleaned_record.get("confidence", 0.5)
             if isinstance(record_confidence, str):
                 try:
@@ -876,7 +1163,6 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
             # Use AI quality assessment if enabled
             if use_ai and not vuln.startswith("(Implied"):
                 try:
-                    from services.ai_enhancer import ai_assess_quality
                     quality_result = ai_assess_quality(cleaned_record)
                     ai_confidence = quality_result.get("confidence", record_confidence)
                     quality_score = quality_result.get("quality_score", 0.5)
@@ -923,8 +1209,6 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
             "(Implied design weakness or gap in planning guidance)"
         )
         implied_count = 0
-        # NOTE: Do NOT include "implied design weakness" - it's legitimate system-generated text
-        placeholder_patterns = ["placeholder", "dummy", "test", "example", "sample", "fake"]
         
         for r in unique_records:
             vuln = r.get("vulnerability", "").strip()
@@ -937,12 +1221,13 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
                     has_real_ofc = any(
                         isinstance(ofc, str) and 
                         len(ofc.strip()) >= 5 and 
-                        not any(pattern in ofc.lower() for pattern in placeholder_patterns)
+                        not _PLACEHOLDER_RE.search(ofc)
                         for ofc in ofcs
                     )
                     
                     if has_real_ofc:
                         r["vulnerability"] = implied_text
+                        r["_vuln_norm"] = normalize_text(implied_text)
                         # Set confidence from heuristics if available
                         if "defaults" in heuristics:
                             r["confidence_score"] = heuristics["defaults"].get("confidence_ofc", 0.6)
@@ -959,6 +1244,10 @@ def postprocess_results(model_results, source_filepath=None, min_confidence=0.4)
     # Add default domains by keyword
     unique_records = add_domain_defaults(unique_records)
     
+    for r in unique_records:
+        for key in _NORM_KEYS:
+            r.pop(key, None)
+    
     logger.info(f"Post-processing complete: {len(unique_records)} unique records (skipped: {skipped})")
     return unique_records
 
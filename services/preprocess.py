@@ -17,16 +17,18 @@ try:
     FITZ_AVAILABLE = True
 except ImportError:
     FITZ_AVAILABLE = False
-    try:
-        import PyPDF2
-        PYPDF2_AVAILABLE = True
-    except ImportError:
-        PYPDF2_AVAILABLE = False
-        try:
-            import pdfplumber
-            PDFPLUMBER_AVAILABLE = True
-        except ImportError:
-            PDFPLUMBER_AVAILABLE = False
+
+try:
+    import pdfplumber
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
 
 try:
     from docx import Document
@@ -101,52 +103,61 @@ def extract_text(path: str) -> str:
         raise
 
 
+def _extract_pdf_fitz(file_path: Path) -> str:
+    """Extract text from PDF using PyMuPDF (fitz) - best for page tracking."""
+    doc = fitz.open(str(file_path))
+    try:
+        page_texts = [page.get_text() for page in doc]
+    finally:
+        doc.close()
+    logger.info(f"Extracted text from PDF using PyMuPDF: {len(page_texts)} pages")
+    return "".join(page_text + "\n" for page_text in page_texts)
+
+
+def _extract_pdf_pdfplumber(file_path: Path) -> str:
+    """Extract text from PDF using pdfplumber."""
+    with pdfplumber.open(str(file_path)) as pdf:
+        page_texts = [page.extract_text() for page in pdf.pages]
+    logger.info(f"Extracted text from PDF using pdfplumber")
+    return "".join(page_text + "\n" for page_text in page_texts if page_text)
+
+
+def _extract_pdf_pypdf2(file_path: Path) -> str:
+    """Extract text from PDF using PyPDF2."""
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        page_texts = [page.extract_text() for page in reader.pages]
+    logger.info(f"Extracted text from PDF using PyPDF2")
+    return "".join(page_text + "\n" for page_text in page_texts)
+
+
+# Available PDF backends in preference order, resolved once at import
+PDF_BACKENDS = [
+    (name, extractor)
+    for name, extractor, available in (
+        ("PyMuPDF", _extract_pdf_fitz, FITZ_AVAILABLE),
+        ("pdfplumber", _extract_pdf_pdfplumber, PDFPLUMBER_AVAILABLE),
+        ("PyPDF2", _extract_pdf_pypdf2, PYPDF2_AVAILABLE),
+    )
+    if available
+]
+
+
 def _extract_pdf(file_path: Path) -> str:
-    """Extract text from PDF file using PyMuPDF (fitz), PyPDF2, or pdfplumber."""
-    text = ""
-    pages = []
-    
-    # Try PyMuPDF (fitz) first - best for page tracking
-    if FITZ_AVAILABLE:
-        try:
-            doc = fitz.open(str(file_path))
-            for page_num, page in enumerate(doc, start=1):
-                page_text = page.get_text()
-                text += page_text + "\n"
-                pages.append((page_num, page_text))
-            doc.close()
-            logger.info(f"Extracted text from PDF using PyMuPDF: {len(pages)} pages")
-            return text
-        except Exception as e:
-            logger.warning(f"PyMuPDF extraction failed: {str(e)}, trying fallback")
-    
-    # Try pdfplumber
-    if PDFPLUMBER_AVAILABLE:
-        try:
-            with pdfplumber.open(str(file_path)) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            logger.info(f"Extracted text from PDF using pdfplumber")
-            return text
-        except Exception as e:
-            logger.warning(f"pdfplumber extraction failed: {str(e)}, trying fallback")
+    """Extract text from PDF file using PyMuPDF (fitz), pdfplumber, or PyPDF2."""
+    if not PDF_BACKENDS:
+        raise ImportError("No PDF parsing library available. Install PyMuPDF (fitz), pdfplumber, or PyPDF2")
     
-    # Fallback to PyPDF2
-    if PYPDF2_AVAILABLE:
+    last_error = None
+    for name, extractor in PDF_BACKENDS:
         try:
-            with open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-            logger.info(f"Extracted text from PDF using PyPDF2")
-            return text
+            return extractor(file_path)
         except Exception as e:
-            logger.error(f"PyPDF2 extraction failed: {str(e)}")
-            raise Exception(f"All PDF extraction methods failed: {str(e)}")
+            logger.warning(f"{name} extraction failed: {str(e)}, trying fallback")
+            last_error = e
     
-    raise ImportError("No PDF parsing library available. Install PyMuPDF (fitz), pdfplumber, or PyPDF2")
+    logger.error(f"All PDF extraction methods failed for {file_path.name}")
+    raise Exception(f"All PDF extraction methods failed: {str(last_error)}")
 
 
 def _extract_docx(file_path: Path) -> str:
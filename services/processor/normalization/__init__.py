@@ -15,6 +15,8 @@ from .discipline_resolver import (
     normalize_discipline_name,
     infer_subtype,
     resolve_discipline_and_subtype,
+    get_normalized_discipline_record,
+    clear_discipline_caches,
     get_subtype_id
 )
 from .vofc_discipline import DisciplineResolver
@@ -41,6 +43,8 @@ __all__ = [
     'normalize_discipline_name',
     'infer_subtype',
     'resolve_discipline_and_subtype',
+    'get_normalized_discipline_record',
+    'clear_discipline_caches',
     'get_subtype_id',
     'DisciplineResolver',
     'DisciplineResolverV2',
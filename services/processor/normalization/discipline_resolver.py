@@ -9,6 +9,7 @@ and infers sub-disciplines using keyword heuristics.
 import logging
 import re
 import warnings
+from functools import lru_cache
 from typing import Dict, Any, Optional, Tuple
 from services.supabase_client import get_discipline_record, get_supabase_client
 
@@ -153,6 +154,7 @@ ESS_INFRASTRUCTURE_KEYWORDS = [
 ]
 
 
+@lru_cache(maxsize=512)
 def normalize_discipline_name(raw_discipline: str) -> Optional[str]:
     """
     ⚠️ DEPRECATED: Use DisciplineResolverV2.resolve() instead.
@@ -302,6 +304,46 @@ def infer_subtype(discipline: str, vulnerability_text: str, ofc_text: Optional[s
     return None
 
 
+# Lookups that found something, kept until clear_discipline_caches() is called
+# (once per document); misses and lookup errors are never stored
+_DISCIPLINE_RECORD_CACHE: Dict[str, Dict[str, Any]] = {}
+_SUBTYPE_ID_CACHE: Dict[Tuple[str, Optional[str]], str] = {}
+
+
+def clear_discipline_caches() -> None:
+    """
+    Drop cached discipline records and subtype IDs.
+    
+    Disciplines and subtypes can be edited from the web app while the service is
+    running, so callers clear these caches before processing each document.
+    """
+    _DISCIPLINE_RECORD_CACHE.clear()
+    _SUBTYPE_ID_CACHE.clear()
+
+
+def get_normalized_discipline_record(normalized_discipline: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the Supabase record for a normalized discipline name.
+    
+    Found records are cached until clear_discipline_caches(): there are only a
+    handful of normalized disciplines, but every record of a document looks one
+    up. Misses are not cached, since get_discipline_record also returns None when
+    the lookup fails. The returned dict is shared and must not be modified.
+    
+    Args:
+        normalized_discipline: One of the normalized discipline names
+        
+    Returns:
+        Discipline record dict or None if not found
+    """
+    record = _DISCIPLINE_RECORD_CACHE.get(normalized_discipline)
+    if record is None:
+        record = get_discipline_record(normalized_discipline, fuzzy=True)
+        if record:
+            _DISCIPLINE_RECORD_CACHE[normalized_discipline] = record
+    return record
+
+
 def resolve_discipline_and_subtype(
     raw_discipline: str,
     vulnerability_text: str = "",
@@ -331,7 +373,7 @@ def resolve_discipline_and_subtype(
     # Get discipline_id from Supabase
     discipline_id = None
     try:
-        disc_record = get_discipline_record(normalized_discipline, fuzzy=True)
+        disc_record = get_normalized_discipline_record(normalized_discipline)
         if disc_record:
             discipline_id = disc_record.get('id')
     except Exception as e:
@@ -357,20 +399,34 @@ def get_subtype_id(subtype_name: str, discipline_id: Optional[str] = None) -> Op
     if not subtype_name:
         return None
     
+    key = (subtype_name, discipline_id)
+    if key in _SUBTYPE_ID_CACHE:
+        return _SUBTYPE_ID_CACHE[key]
+    
     try:
-        client = get_supabase_client()
-        query = client.table("discipline_subtypes").select("id").eq("name", subtype_name).eq("is_active", True)
-        
-        if discipline_id:
-            query = query.eq("discipline_id", discipline_id)
-        
-        result = query.maybe_single().execute()
-        
-        if result.data:
-            return result.data.get('id')
-        
-        return None
+        subtype_id = _query_subtype_id(subtype_name, discipline_id)
     except Exception as e:
         logger.warning(f"Could not get subtype_id for '{subtype_name}': {e}")
         return None
+    
+    # Only found IDs are cached (until clear_discipline_caches())
+    if subtype_id:
+        _SUBTYPE_ID_CACHE[key] = subtype_id
+    return subtype_id
+
+
+def _query_subtype_id(subtype_name: str, discipline_id: Optional[str]) -> Optional[str]:
+    """Supabase subtype lookup for get_subtype_id (errors propagate to the caller)."""
+    client = get_supabase_client()
+    query = client.table("discipline_subtypes").select("id").eq("name", subtype_name).eq("is_active", True)
+    
+    if discipline_id:
+        query = query.eq("discipline_id", discipline_id)
+    
+    result = query.maybe_single().execute()
+    
+    if result.data:
+        return result.data.get('id')
+    
+    return None
 
@@ -5,7 +5,7 @@ Handles uploading extracted records to Supabase with deduplication.
 import os
 import uuid
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
 from config.exceptions import ServiceError, ConfigurationError
 from config import Config
@@ -260,6 +260,8 @@ def upload_to_supabase(
     # ALWAYS create submission record, even if record processing had errors
     # This ensures the JSON file is linked to a submission in the database
     try:
+        # One timezone-aware timestamp for the whole submission
+        now_iso = datetime.now(timezone.utc).isoformat()
         submission_payload = {
             "id": submission_id,
             "type": "document",
@@ -269,7 +271,7 @@ def upload_to_supabase(
             "document_name": os.path.basename(file_path),
             "data": {
                 "source_file": os.path.basename(file_path),
-                "processed_at": datetime.utcnow().isoformat(),
+                "processed_at": now_iso,
                 "total_records": len(records),
                 "records": records,  # Include all records in submission data
                 "model_version": getattr(Config, 'DEFAULT_MODEL', 'vofc-unified:latest'),
@@ -278,8 +280,8 @@ def upload_to_supabase(
                 "processed_vuln_ids": processed_vuln_ids,
                 "processed_ofc_ids": processed_ofc_ids
             },
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
+            "created_at": now_iso,
+            "updated_at": now_iso
         }
         
         result = supabase.table("submissions").insert(submission_payload).execute()
@@ -0,0 +1,149 @@
+"""
+Regression tests for the per-document taxonomy lookup caches
+(services.postprocess discipline and sector/subsector lookups, and the discipline_resolver lookups)
+"""
+import pytest
+
+from services import postprocess
+from services.processor.normalization import discipline_resolver
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    postprocess.invalidate_discipline_cache()
+    yield
+    postprocess.invalidate_discipline_cache()
+
+
+def _fake_lookup(monkeypatch, records):
+    """Serve get_discipline_record from a dict, counting exact-name lookups."""
+    calls = []
+
+    def get_discipline_record(name=None, all=False, fuzzy=False):
+        if all:
+            return list(records.values())
+        calls.append(name)
+        return records.get(name)
+
+    monkeypatch.setattr(postprocess, "get_discipline_record", get_discipline_record)
+    return calls
+
+
+def test_resolved_discipline_is_reused_within_document(monkeypatch):
+    calls = _fake_lookup(monkeypatch, {"physical security": {"id": "d1", "name": "Physical Security", "category": "Physical"}})
+
+    assert postprocess.resolve_discipline("Physical Security") == ("d1", "Physical")
+    assert postprocess.resolve_discipline("physical security") == ("d1", "Physical")
+    assert calls == ["physical security"]
+
+
+def test_failed_lookup_is_retried(monkeypatch):
+    records = {}
+    calls = _fake_lookup(monkeypatch, records)
+
+    assert postprocess.resolve_discipline("Cyber") == (None, None)
+    records["cyber"] = {"id": "d2", "name": "Cyber", "category": "Cyber"}
+    assert postprocess.resolve_discipline("Cyber") == ("d2", "Cyber")
+    assert calls == ["cyber", "cyber"]
+
+
+def test_invalidate_drops_resolved_disciplines(monkeypatch):
+    records = {"cyber": {"id": "d2", "name": "Cyber", "category": "Cyber"}}
+    _fake_lookup(monkeypatch, records)
+
+    assert postprocess.resolve_discipline("Cyber") == ("d2", "Cyber")
+    records["cyber"] = {"id": "d3", "name": "Cyber", "category": "Cyber"}
+    postprocess.invalidate_discipline_cache()
+    assert postprocess.resolve_discipline("Cyber") == ("d3", "Cyber")
+
+
+def test_missing_discipline_record_is_retried(monkeypatch):
+    records = {}
+    monkeypatch.setattr(
+        discipline_resolver, "get_discipline_record",
+        lambda name, fuzzy=False: records.get(name),
+    )
+
+    assert discipline_resolver.get_normalized_discipline_record("Cyber") is None
+    records["Cyber"] = {"id": "d2", "name": "Cyber"}
+    assert discipline_resolver.get_normalized_discipline_record("Cyber") == {"id": "d2", "name": "Cyber"}
+
+    records["Cyber"] = {"id": "d3", "name": "Cyber"}
+    assert discipline_resolver.get_normalized_discipline_record("Cyber")["id"] == "d2"
+    postprocess.invalidate_discipline_cache()
+    assert discipline_resolver.get_normalized_discipline_record("Cyber")["id"] == "d3"
+
+
+def test_subtype_id_misses_and_errors_are_not_cached(monkeypatch):
+    results = [RuntimeError("timeout"), None, "s1", "s2"]
+
+    def query_subtype_id(subtype_name, discipline_id):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(discipline_resolver, "_query_subtype_id", query_subtype_id)
+
+    assert discipline_resolver.get_subtype_id("CCTV", "d1") is None
+    assert discipline_resolver.get_subtype_id("CCTV", "d1") is None
+    assert discipline_resolver.get_subtype_id("CCTV", "d1") == "s1"
+    assert discipline_resolver.get_subtype_id("CCTV", "d1") == "s1"
+    postprocess.invalidate_discipline_cache()
+    assert discipline_resolver.get_subtype_id("CCTV", "d1") == "s2"
+
+
+class _FakeTable:
+    """Just enough of the Supabase query builder for _lookup_taxonomy_id."""
+
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.value = value
+        return self
+
+    def maybe_single(self):
+        return self
+
+    def execute(self):
+        self.calls.append(self.value)
+        row_id = self.rows.get(self.value)
+        return type("Result", (), {"data": {"id": row_id} if row_id else None})()
+
+
+def _fake_sectors(monkeypatch, rows):
+    calls = []
+    client = type("Client", (), {"table": lambda self, name: _FakeTable(rows, calls)})()
+    monkeypatch.setattr(postprocess, "get_supabase_client", lambda: client)
+    return calls
+
+
+def test_taxonomy_ids_are_cached_per_document(monkeypatch):
+    rows = {"Energy": "s1"}
+    calls = _fake_sectors(monkeypatch, rows)
+
+    assert postprocess._lookup_taxonomy_id("sectors", "name", "Energy") == "s1"
+    assert postprocess._lookup_taxonomy_id("sectors", "name", "Energy") == "s1"
+    assert postprocess._lookup_taxonomy_id("sectors", "name", "Water") is None
+    rows["Water"] = "s2"
+    assert postprocess._lookup_taxonomy_id("sectors", "name", "Water") == "s2"
+    assert calls == ["Energy", "Water", "Water"]
+
+    del rows["Energy"]
+    postprocess.invalidate_discipline_cache()
+    assert postprocess._lookup_taxonomy_id("sectors", "name", "Energy") is None
+
+
+def test_taxonomy_id_cache_is_bounded(monkeypatch):
+    _fake_sectors(monkeypatch, {f"Sector {n}": f"s{n}" for n in range(5)})
+    monkeypatch.setattr(postprocess, "TAXONOMY_ID_CACHE_SIZE", 3)
+
+    for n in range(5):
+        postprocess._lookup_taxonomy_id("sectors", "name", f"Sector {n}")
+
+    assert list(postprocess._TAXONOMY_ID_CACHE) == [("sectors", "name", f"Sector {n}") for n in (2, 3, 4)]
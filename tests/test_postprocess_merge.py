@@ -0,0 +1,141 @@
+"""
+Regression tests for merge_similar_duplicates in services.postprocess
+(union-find clustering, category bucketing and LSH candidate blocking)
+"""
+import random
+
+import pytest
+
+from services import postprocess
+
+WORDS = (
+    "access control perimeter fence gate lighting camera guard visitor screening badge "
+    "door lock alarm vehicle barrier entrance parking security plan emergency evacuation "
+    "drill training staff policy review network password server backup lobby roof"
+).split()
+
+
+@pytest.fixture(autouse=True)
+def rule_based_merging(monkeypatch):
+    """Merge decisions come from text similarity, never from the AI enhancer."""
+    monkeypatch.setattr(postprocess.Config, "ENABLE_AI_ENHANCEMENT", False)
+
+
+def _record(vulnerability, ofc, category=None, confidence=0.5):
+    rec = {
+        "vulnerability": vulnerability,
+        "options_for_consideration": [ofc],
+        "confidence_score": confidence,
+    }
+    if category:
+        rec["category"] = category
+    return rec
+
+
+def _summary(merged):
+    return [(r.get("category"), r["options_for_consideration"]) for r in merged]
+
+
+def test_uncategorized_record_does_not_bridge_categories():
+    records = [
+        _record("No vehicle barrier at the main entrance", "a", "Perimeter", 0.9),
+        _record("No vehicle barrier at the main entrances", "b"),
+        _record("No vehicle barriers at the main entrance", "c", "Operations"),
+    ]
+
+    merged = postprocess.merge_similar_duplicates(records)
+
+    assert _summary(merged) == [("Perimeter", ["a", "b"]), ("Operations", ["c"])]
+
+
+def test_chain_of_near_duplicates_merges_into_one_cluster():
+    # a~b and b~c are at the 0.8 threshold, a~c is only 0.6
+    records = [
+        _record("a" * 20, "a", "Perimeter", 0.9),
+        _record("a" * 16 + "b" * 4, "b", "Perimeter", 0.8),
+        _record("a" * 12 + "b" * 8, "c", "Perimeter", 0.7),
+    ]
+
+    merged = postprocess.merge_similar_duplicates(records)
+
+    assert _summary(merged) == [("Perimeter", ["a", "b", "c"])]
+    assert merged[0]["confidence_score"] == 0.9
+
+
+def test_different_categories_never_merge():
+    records = [
+        _record("No vehicle barrier at the main entrance", "a", "Perimeter", 0.9),
+        _record("No vehicle barrier at the main entrance", "b", "Operations"),
+    ]
+
+    merged = postprocess.merge_similar_duplicates(records)
+
+    assert _summary(merged) == [("Perimeter", ["a"]), ("Operations", ["b"])]
+
+
+def test_output_keeps_input_order_when_nothing_merges():
+    records = [
+        _record("Visitor screening procedures are not documented", "a", "Access Control", 0.4),
+        _record("No vehicle barrier at the main entrance", "b", "Perimeter", 0.9),
+        _record("Emergency evacuation drills are not held", "c", "Operations", 0.6),
+    ]
+
+    merged = postprocess.merge_similar_duplicates(records)
+
+    assert merged == records
+
+
+def test_merged_record_keeps_position_of_first_member():
+    records = [
+        _record("Emergency evacuation drills are not held", "a", "Operations", 0.4),
+        _record("No vehicle barrier at the main entrance", "b", "Perimeter", 0.5),
+        _record("No vehicle barrier at the main entrances", "c", "Perimeter", 0.9),
+    ]
+
+    merged = postprocess.merge_similar_duplicates(records)
+
+    # Based on the most confident member, placed where the group first appears
+    assert _summary(merged) == [("Operations", ["a"]), ("Perimeter", ["c", "b"])]
+    assert merged[1]["vulnerability"] == "No vehicle barrier at the main entrances"
+
+
+def test_lsh_candidates_merge_near_duplicates(monkeypatch):
+    pytest.importorskip("datasketch")
+    monkeypatch.setattr(postprocess, "LSH_MIN_RECORDS", 1)
+    records = [
+        _record("No vehicle barrier at the main entrance", "a", "Perimeter", 0.9),
+        _record("Visitor screening procedures are not documented", "b", "Access Control"),
+        _record("No vehicle barrier at the main entrances", "c", "Perimeter"),
+    ]
+
+    merged = postprocess.merge_similar_duplicates(records)
+
+    assert _summary(merged) == [("Perimeter", ["a", "c"]), ("Access Control", ["b"])]
+
+
+def _two_word_edit_pairs(count, seed=0):
+    """Pairs of vulnerability texts that differ in two words but stay >= 0.8 similar."""
+    rng = random.Random(seed)
+    texts = []
+    while len(texts) < 2 * count:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 14))]
+        edited = list(words)
+        for k in rng.sample(range(len(words)), 2):
+            edited[k] = rng.choice(WORDS)
+        text, edited_text = " ".join(words), " ".join(edited)
+        if text != edited_text and postprocess.SequenceMatcher(None, text, edited_text).ratio() >= 0.8:
+            texts += [text, edited_text]
+    return [_record(text, str(idx)) for idx, text in enumerate(texts)]
+
+
+def test_lsh_candidates_keep_multi_word_edits(monkeypatch):
+    pytest.importorskip("datasketch")
+    records = _two_word_edit_pairs(150)
+
+    monkeypatch.setattr(postprocess, "LSH_MIN_RECORDS", len(records) + 1)
+    exact = postprocess.merge_similar_duplicates([dict(r) for r in records])
+    monkeypatch.setattr(postprocess, "LSH_MIN_RECORDS", 1)
+    blocked = postprocess.merge_similar_duplicates([dict(r) for r in records])
+
+    assert len(exact) <= 150
+    assert _summary(blocked) == _summary(exact)